@@ -10,6 +10,8 @@ import json
 from rag.ingestion import Ingestor
 from rag.retriever import Retriever
 from rag.generator import Generator
+from rag.web_search import WebSearcher
+from rag.context import build_context
 
 app = FastAPI(title="Question Paper Generator API")
 
@@ -18,6 +20,25 @@ ingestor = Ingestor(base_upload_dir="uploads")
 retriever = Retriever(persist_directory="chroma_db")
 generator = Generator()
 
+def env_flag(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+# Web grounding for thin subjects, off unless explicitly enabled
+web_searcher = None
+if env_flag("WEB_SEARCH_ENABLED"):
+    web_searcher = WebSearcher(
+        cache_dir="web_cache",
+        ttl_seconds=int(os.getenv("WEB_SEARCH_CACHE_TTL", "86400")),
+        network_timeout=int(os.getenv("WEB_SEARCH_NETWORK_TIMEOUT", "5")),
+        max_in_flight=int(os.getenv("WEB_SEARCH_MAX_IN_FLIGHT", "4")),
+    )
+web_search_grace = float(os.getenv("WEB_SEARCH_GRACE", "0.2"))
+# Chat messages are only sent to the search engine when explicitly allowed
+web_search_forward_chat = env_flag("WEB_SEARCH_FORWARD_CHAT")
+
 # Setup CORS for the frontend
 app.add_middleware(
     CORSMiddleware,
@@ -70,6 +91,9 @@ def get_or_create_subject_cos(subject: str, context: str):
         json.dump({"course_outcomes": cos}, f)
     return cos
 
+async def get_context(query: str, subject: str, k: int, web_query: str) -> str:
+    return await build_context(retriever, web_searcher, query, subject, k, web_query=web_query, grace=web_search_grace)
+
 @app.get("/subjects")
 def get_subjects():
     if not os.path.exists("uploads"):
@@ -158,9 +182,8 @@ async def generate_qp(request: GenerateRequest):
         # Construct query based on subject and focus
         query = f"Provide relevant concepts and details for question generation about {request.subject}"
         
-        # Retrieve context
-        results = retriever.search(query, request.subject, k=5)
-        context = "\\n\\n".join([r.page_content for r in results])
+        # Retrieve context (thin subjects are topped up with web results)
+        context = await get_context(query, request.subject, k=5, web_query=f"{request.subject} key concepts")
         
         if not context:
             context = "No direct context found in uploaded materials. Use general knowledge."
@@ -199,8 +222,7 @@ async def generate_full_qp(request: GenerateFullRequest):
         query = f"Provide a complete, comprehensive overview of the syllabus, main topics, and key concepts for {request.subject}"
         
         # Retrieve context (fetch a bit more for a full paper)
-        results = retriever.search(query, request.subject, k=10)
-        context = "\\n\\n".join([r.page_content for r in results])
+        context = await get_context(query, request.subject, k=10, web_query=f"{request.subject} syllabus topics")
         
         if not context:
             context = "No direct context found in uploaded materials. Use general knowledge about the subject."
@@ -231,8 +253,7 @@ async def generate_quiz_endpoint(request: QuizRequest):
         query = f"Provide relevant concepts and details for {request.quiz_type} questions about {request.subject}"
         
         # Retrieve context
-        results = retriever.search(query, request.subject, k=8)
-        context = "\\n\\n".join([r.page_content for r in results])
+        context = await get_context(query, request.subject, k=8, web_query=f"{request.subject} {request.quiz_type} questions")
         
         if not context:
             context = "No direct context found in uploaded materials. Use general knowledge."
@@ -256,8 +277,8 @@ async def generate_quiz_endpoint(request: QuizRequest):
 @app.post("/chat")
 async def chat_with_context(request: ChatRequest):
     try:
-        results = retriever.search(request.message, request.subject, k=8)
-        context = "\\n\\n".join([r.page_content for r in results])
+        web_query = f"{request.subject} {request.message}" if web_search_forward_chat else f"{request.subject} key concepts"
+        context = await get_context(request.message, request.subject, k=8, web_query=web_query)
         
         if not context:
             context = "No direct context found in uploaded materials. Use general knowledge."
@@ -0,0 +1,35 @@
+import asyncio
+
+
+async def _web_context_if_thin(retriever, web_searcher, subject: str, k: int, web_query: str) -> str:
+    # Subjects with fewer than k chunks always come back thin
+    count = await asyncio.to_thread(retriever.count_documents, subject)
+    if count >= k:
+        return ""
+    return await web_searcher.fetch_context(web_query)
+
+
+async def build_context(retriever, web_searcher, query: str, subject: str, k: int, web_query: str = None, grace: float = 0.2) -> str:
+    """
+    Retrieve vector context for a subject, grounding thin subjects with web
+    context. The web lookup runs alongside retrieval and is only merged if it
+    is ready within `grace` seconds of retrieval returning.
+    """
+    web_task = None
+    if web_searcher is not None and web_query:
+        web_task = asyncio.create_task(_web_context_if_thin(retriever, web_searcher, subject, k, web_query))
+
+    try:
+        results = await asyncio.to_thread(retriever.search, query, subject, k=k)
+        context = "\\n\\n".join([r.page_content for r in results])
+
+        if web_task is not None:
+            done, _ = await asyncio.wait({web_task}, timeout=grace)
+            web_context = web_task.result() if web_task in done else ""
+            if web_context:
+                context = f"{context}\\n\\n{web_context}" if context else web_context
+        return context
+    finally:
+        # The underlying search is shielded and still fills the cache
+        if web_task is not None and not web_task.done():
+            web_task.cancel()
@@ -53,6 +53,17 @@ class Retriever:
             print(f"Failed to delete subject collection: {e}")
             return False
         
+    def count_documents(self, subject: str) -> int:
+        safe_subject = "".join([c if c.isalnum() else "_" for c in subject])
+        if not safe_subject:
+            safe_subject = "default_subject"
+            
+        try:
+            return self.client.get_collection(name=safe_subject).count()
+        except Exception:
+            # Collection might not exist yet
+            return 0
+        
     def search(self, query: str, subject: str, k: int = 5):
         vectorstore = self._get_vectorstore_for_subject(subject)
         return vectorstore.similarity_search(query, k=k)
@@ -1,26 +1,164 @@
-from duckduckgo_search import DDGS
-from typing import List, Dict
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional
+
+
+class DuckDuckGoBackend:
+    """Default search backend backed by DuckDuckGo text search."""
+
+    def __init__(self, timeout: int = 5):
+        # Network timeout so searches abandoned by a caller still end promptly
+        self.timeout = timeout
+
+    def search(self, query: str, max_results: int = 3) -> List[Dict]:
+        from duckduckgo_search import DDGS
+        with DDGS(timeout=self.timeout) as ddgs:
+            return list(ddgs.text(query, max_results=max_results))
+
 
 class WebSearcher:
-    def __init__(self):
-        self.ddgs = DDGS()
-        
+    def __init__(
+        self,
+        backend=None,
+        cache_dir: str = "web_cache",
+        ttl_seconds: int = 24 * 60 * 60,
+        network_timeout: int = 5,
+        max_workers: int = 2,
+        max_in_flight: int = 4,
+    ):
+        # Any object exposing search(query, max_results) -> List[Dict] can be plugged in
+        self.backend = backend if backend is not None else DuckDuckGoBackend(timeout=network_timeout)
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_in_flight = max_in_flight
+        # Dedicated pool so slow searches never queue ahead of the loop's default executor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="web-search")
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _cache_key(self, query: str, max_results: int) -> str:
+        return hashlib.sha256(f"{max_results}:{query.strip().lower()}".encode("utf-8")).hexdigest()
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_cache(self, key: str) -> Optional[List[Dict]]:
+        cache_file = self._cache_path(key)
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, "r") as f:
+                data = json.load(f)
+            if time.time() - data.get("timestamp", 0) > self.ttl_seconds:
+                self._remove(cache_file)
+                return None
+            return data.get("results", [])
+        except Exception as e:
+            print(f"Error reading web cache: {e}")
+            return None
+
+    def _write_cache(self, key: str, query: str, results: List[Dict]):
+        cache_file = self._cache_path(key)
+        tmp_file = f"{cache_file}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_file, "w") as f:
+                json.dump({"timestamp": time.time(), "query": query, "results": results}, f)
+            os.replace(tmp_file, cache_file)
+        except Exception as e:
+            print(f"Error writing web cache: {e}")
+            self._remove(tmp_file)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _fetch(self, key: str, query: str, max_results: int) -> List[Dict]:
+        try:
+            results = self.backend.search(query, max_results=max_results)
+        except Exception as e:
+            print(f"Web search error: {e}")
+            return []
+
+        self._write_cache(key, query, results)
+        return results
+
+    def _release(self, key: str, future):
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def start_search(self, query: str, max_results: int = 3):
+        """
+        Schedule a backend search on the web search pool and return its future.
+        Callers check the cache first; only misses should reach this point.
+        Concurrent requests for the same query share one search. Returns None
+        when too many searches are already in flight.
+        """
+        key = self._cache_key(query, max_results)
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future
+            if len(self._in_flight) >= self.max_in_flight:
+                return None
+            future = self._executor.submit(self._fetch, key, query, max_results)
+            self._in_flight[key] = future
+        future.add_done_callback(lambda f: self._release(key, f))
+        return future
+
     def search(self, query: str, max_results: int = 3) -> List[Dict]:
         """
-        Perform a DuckDuckGo search to ground the generated questions
+        Perform a web search to ground the generated questions
         in current or external knowledge if the knowledge base is insufficient.
+        Results are served from the TTL disk cache when available.
         """
-        results = []
+        key = self._cache_key(query, max_results)
+        cached = self._read_cache(key)
+        if cached is not None:
+            return cached
+        return self._fetch(key, query, max_results)
+
+    async def fetch_context(self, query: str, max_results: int = 3, timeout: Optional[float] = None) -> str:
+        """
+        Return formatted web context, or an empty string if the lookup is
+        skipped or does not complete within `timeout` seconds (no limit when
+        None). A search that misses the deadline keeps running and still fills
+        the cache for the next request.
+        """
+        key = self._cache_key(query, max_results)
+        cached = await asyncio.to_thread(self._read_cache, key)
+        if cached is not None:
+            return self.format_results_for_context(cached)
+
+        future = self.start_search(query, max_results)
+        if future is None:
+            print(f"Web search skipped, too many searches in flight: {query}")
+            return ""
+
         try:
-            for r in self.ddgs.text(query, max_results=max_results):
-                results.append(r)
-        except Exception as e:
-            print(f"Web search error: {e}")
-            
-        return results
+            # shield() so a timeout or cancellation does not cancel the shared search
+            results = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=timeout)
+        except asyncio.TimeoutError:
+            print(f"Web search timed out after {timeout}s for query: {query}")
+            return ""
+        return self.format_results_for_context(results)
+
+    def close(self):
+        """Wait for outstanding searches and shut down the search pool."""
+        self._executor.shutdown(wait=True)
 
     def format_results_for_context(self, results: List[Dict]) -> str:
         """Format search results to be injected into the LLM prompt."""
+        if not results:
+            return ""
         context = "Additional Web Context:\\n"
         for idx, res in enumerate(results):
             context += f"{idx+1}. {res.get('title')}: {res.get('body')}\\n\\n"
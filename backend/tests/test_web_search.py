@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from rag.context import build_context
+from rag.web_search import WebSearcher
+
+
+class StubBackend:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query, max_results=3):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        return [{"title": "Result", "body": query}]
+
+
+class StubRetriever:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def count_documents(self, subject):
+        return len(self.chunks)
+
+    def search(self, query, subject, k=5):
+        return [SimpleNamespace(page_content=c) for c in self.chunks[:k]]
+
+
+class FailingRetriever(StubRetriever):
+    def search(self, query, subject, k=5):
+        raise RuntimeError("retrieval failed")
+
+
+@pytest.fixture
+def make_searcher(tmp_path):
+    searchers = []
+
+    def _make(backend, **kwargs):
+        searcher = WebSearcher(backend=backend, cache_dir=str(tmp_path / "web_cache"), **kwargs)
+        searchers.append(searcher)
+        return searcher
+
+    yield _make
+    for searcher in searchers:
+        searcher.close()
+
+
+def test_cache_hit_skips_backend(make_searcher):
+    backend = StubBackend()
+    searcher = make_searcher(backend)
+
+    first = searcher.search("operating systems")
+    second = searcher.search("operating systems")
+
+    assert first == second
+    assert backend.calls == 1
+
+
+def test_expired_cache_entry_calls_backend_again(make_searcher):
+    backend = StubBackend()
+    searcher = make_searcher(backend, ttl_seconds=60)
+    searcher.search("compilers")
+
+    path = searcher._cache_path(searcher._cache_key("compilers", 3))
+    with open(path, "r") as f:
+        data = json.load(f)
+    data["timestamp"] -= 120
+    with open(path, "w") as f:
+        json.dump(data, f)
+
+    assert searcher._read_cache(searcher._cache_key("compilers", 3)) is None
+    assert not os.path.exists(path)
+
+    searcher.search("compilers")
+    assert backend.calls == 2
+
+
+def test_slow_backend_returns_empty_within_deadline(make_searcher):
+    searcher = make_searcher(StubBackend(delay=0.5))
+
+    async def run():
+        context = await searcher.fetch_context("networks", timeout=0.05)
+        future = searcher.start_search("networks")
+        pending = future is not None and not future.done()
+        await asyncio.to_thread(searcher.close)
+        return context, pending
+
+    context, pending = asyncio.run(run())
+    assert context == ""
+    assert pending
+
+
+def test_late_result_is_written_to_cache(make_searcher):
+    backend = StubBackend(delay=0.2)
+    searcher = make_searcher(backend)
+
+    async def run():
+        missed = await searcher.fetch_context("databases", timeout=0.01)
+        await asyncio.to_thread(searcher.close)
+        return missed
+
+    assert asyncio.run(run()) == ""
+    assert os.path.exists(searcher._cache_path(searcher._cache_key("databases", 3)))
+
+    context = asyncio.run(searcher.fetch_context("databases", timeout=0.01))
+    assert "databases" in context
+    assert backend.calls == 1
+
+
+def test_cached_query_served_while_pool_is_full(make_searcher):
+    backend = StubBackend()
+    searcher = make_searcher(backend, max_workers=2, max_in_flight=2)
+    searcher.search("cached")
+    backend.delay = 1.0
+
+    async def run():
+        slow = [searcher.start_search("slow one"), searcher.start_search("slow two")]
+        context = await searcher.fetch_context("cached", timeout=0.5)
+        await asyncio.to_thread(searcher.close)
+        return slow, context
+
+    slow, context = asyncio.run(run())
+    assert all(f is not None for f in slow)
+    assert "cached" in context
+    assert backend.calls == 3
+
+
+def test_concurrent_misses_share_one_search(make_searcher):
+    backend = StubBackend(delay=0.1)
+    searcher = make_searcher(backend)
+
+    async def run():
+        return await asyncio.gather(*[searcher.fetch_context("graphs", timeout=5.0) for _ in range(5)])
+
+    contexts = asyncio.run(run())
+    assert all("graphs" in c for c in contexts)
+    assert backend.calls == 1
+
+
+def test_lookups_skipped_when_in_flight_cap_reached(make_searcher):
+    backend = StubBackend(delay=0.3)
+    searcher = make_searcher(backend, max_in_flight=1)
+
+    async def run():
+        first = searcher.start_search("first")
+        context = await searcher.fetch_context("second", timeout=5.0)
+        await asyncio.to_thread(searcher.close)
+        return first, context
+
+    first, context = asyncio.run(run())
+    assert first is not None
+    assert context == ""
+    assert backend.calls == 1
+
+
+def test_slow_searches_do_not_block_default_executor(make_searcher):
+    searcher = make_searcher(StubBackend(delay=1.0), max_workers=1)
+
+    async def run():
+        await asyncio.gather(*[searcher.fetch_context(f"query {i}", timeout=0.01) for i in range(10)])
+        in_flight = list(searcher._in_flight.values())
+        await asyncio.to_thread(lambda: None)
+        still_running = any(not f.done() for f in in_flight)
+        await asyncio.to_thread(searcher.close)
+        return still_running
+
+    # The default executor answered while the search pool was still busy
+    assert asyncio.run(run())
+
+
+def test_build_context_merges_fast_web_results(make_searcher):
+    searcher = make_searcher(StubBackend())
+    retriever = StubRetriever(["chunk one"])
+
+    context = asyncio.run(build_context(retriever, searcher, "q", "Physics", k=5, web_query="physics basics", grace=1.0))
+    assert "chunk one" in context
+    assert "Additional Web Context" in context
+    assert "physics basics" in context
+
+
+def test_build_context_drops_slow_web_results(make_searcher):
+    searcher = make_searcher(StubBackend(delay=0.5))
+    retriever = StubRetriever(["chunk one"])
+
+    async def run():
+        context = await build_context(retriever, searcher, "q", "Physics", k=5, web_query="physics basics", grace=0.05)
+        future = searcher.start_search("physics basics")
+        pending = future is not None and not future.done()
+        await asyncio.to_thread(searcher.close)
+        return context, pending
+
+    context, pending = asyncio.run(run())
+    assert context == "chunk one"
+    assert pending
+
+
+def test_build_context_skips_web_for_well_covered_subjects(make_searcher):
+    backend = StubBackend()
+    searcher = make_searcher(backend)
+    retriever = StubRetriever([f"chunk {i}" for i in range(5)])
+
+    context = asyncio.run(build_context(retriever, searcher, "q", "Physics", k=5, web_query="physics basics"))
+    assert "Additional Web Context" not in context
+    assert backend.calls == 0
+
+
+def test_build_context_cancels_web_wait_when_retrieval_fails(make_searcher):
+    searcher = make_searcher(StubBackend(delay=0.2))
+    retriever = FailingRetriever([])
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await build_context(retriever, searcher, "q", "Physics", k=5, web_query="physics basics")
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        await asyncio.sleep(0.01)
+        await asyncio.to_thread(searcher.close)
+        return pending
+
+    pending = asyncio.run(run())
+    assert pending
+    assert all(t.cancelled() for t in pending)